@@ -1,15 +1,52 @@
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
-from typing import Optional, Dict, Any, List, Tuple
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import HTMLResponse, JSONResponse
+from typing import Optional, Dict, Any, List, Tuple, Callable
+from bisect import bisect_left
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from operator import itemgetter
+from string import Template
+import gzip
 import os
 import json
+import hashlib
+import logging
+import threading
+import time
+import brotli
+import orjson
 import requests
-from bs4 import BeautifulSoup
+from pydantic import conint
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from lxml import etree
+from lxml import html as lxml_html
 import unicodedata
 import re
+import sys
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
+
+
+class ORJSONResponse(JSONResponse):
+    # Sérialisation orjson (Rust) au lieu du json stdlib; fastapi.responses.ORJSONResponse est déprécié.
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    # Cache joueurs chauffé en tâche de fond: la première requête ne paie pas la pagination.
+    threading.Thread(target=_refresh_active_players_forever, daemon=True).start()
+    # Index ESPN/CBS et liste balldontlie tenus à jour hors du chemin des requêtes.
+    threading.Thread(target=_refresh_injury_sources_forever, daemon=True).start()
+    yield
+
+
+app = FastAPI(lifespan=_lifespan, default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -18,25 +55,292 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Widget HTML et roster JSON se compressent ~5-10x; les petites réponses restent brutes.
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+# ============================================================
+#                    CLIENT HTTP PARTAGÉ
+# ============================================================
+
+# Une seule Session: urllib3 garde les connexions (TCP + TLS) ouvertes
+# entre deux appels vers le même hôte.
+_SESSION = requests.Session()
+# Accept-Encoding par défaut de requests: gzip, deflate, et br dès que brotli est installé
+# (requirements.txt); les pages ESPN/CBS/NBC arrivent compressées et sont décodées par urllib3.
+_SESSION.headers.update({"User-Agent": "Mozilla/5.0"})
+# pool_maxsize = connexions gardées par hôte: couvre _IO_POOL + le threadpool FastAPI en rafale.
+# 502/503/504 (proxy ou amont en redémarrage) sont rejoués; raise_on_status=False rend la
+# dernière réponse telle quelle pour que les appelants gardent leur gestion de status_code.
+# Un read timeout n'est jamais rejoué (read=0): le timeout de l'appelant reste la borne réelle;
+# seul l'établissement de connexion a droit à un second essai.
+_HTTP_ADAPTER = HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(
+        total=2,
+        connect=1,
+        read=0,
+        backoff_factor=0.2,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({"GET"}),
+        raise_on_status=False,
+    ),
+)
+_SESSION.mount("http://", _HTTP_ADAPTER)
+_SESSION.mount("https://", _HTTP_ADAPTER)
+
+# Pool partagé pour lancer les appels réseau indépendants en parallèle.
+_IO_POOL = ThreadPoolExecutor(max_workers=8)
+
+
+# ============================================================
+#                         CACHE TTL
+# ============================================================
+
+# Les pages de blessures bougent au mieux toutes les quelques minutes.
+INJURIES_CACHE_TTL = int(os.getenv("INJURIES_CACHE_TTL", "120"))
+
+_TTL_CACHE: Dict[str, Tuple[float, Any]] = {}
+_TTL_CACHE_LOCKS: Dict[str, threading.Lock] = {}
+
+
+def _cached(key: str, loader: Callable[[], Any], ttl: float = INJURIES_CACHE_TTL, force: bool = False) -> Any:
+    hit = _TTL_CACHE.get(key)
+    if not force and hit is not None and hit[0] > time.monotonic():
+        return hit[1]
+
+    # Single-flight par clé: à l'expiration, un seul thread recharge, les autres attendent son résultat.
+    lock = _TTL_CACHE_LOCKS.setdefault(key, threading.Lock())
+    with lock:
+        hit = _TTL_CACHE.get(key)
+        if not force and hit is not None and hit[0] > time.monotonic():
+            return hit[1]
+
+        try:
+            value = loader()
+        finally:
+            pending = _PENDING_VALIDATORS.pop(key, None)
+        _TTL_CACHE[key] = (time.monotonic() + ttl, value)
+        # Validateurs amont retenus seulement une fois la page parsée et sa valeur en cache.
+        if pending is not None:
+            url, validators = pending
+            _UPSTREAM_VALIDATORS[url] = validators
+        return value
+
+
+_IN_FLIGHT: Dict[Any, Future] = {}
+_IN_FLIGHT_LOCK = threading.Lock()
+
+
+def _single_flight(key: Any, compute: Callable[[], Any]) -> Any:
+    # Calculs identiques simultanés: le premier appelant calcule, les autres attendent son
+    # Future (résultat ou exception). Rien n'est gardé une fois le calcul terminé.
+    with _IN_FLIGHT_LOCK:
+        future = _IN_FLIGHT.get(key)
+        leader = future is None
+        if leader:
+            future = _IN_FLIGHT[key] = Future()
+    if leader:
+        try:
+            future.set_result(compute())
+        except BaseException as e:
+            # BaseException aussi (KeyboardInterrupt, SystemExit...): sinon les suiveurs attendraient
+            # un Future jamais résolu. Le leader relance l'exception d'origine.
+            future.set_exception(e)
+            raise
+        finally:
+            with _IN_FLIGHT_LOCK:
+                del _IN_FLIGHT[key]
+    return future.result()
+
+
+# URL amont -> en-têtes conditionnels (ETag, Last-Modified) de la dernière réponse 200 dont
+# la valeur parsée est en cache.
+_UPSTREAM_VALIDATORS: Dict[str, Dict[str, str]] = {}
+# Clé de cache -> (URL, validateurs) d'une réponse 200 pas encore parsée: _cached ne les
+# promeut qu'après avoir stocké la valeur. Si le parsing échoue, l'ancienne valeur reste
+# associée aux anciens validateurs, et un 304 ne peut pas la reconduire pour la nouvelle page.
+_PENDING_VALIDATORS: Dict[str, Tuple[str, Dict[str, str]]] = {}
+
+
+def _get_if_modified(url: str, cache_key: str, timeout: float) -> requests.Response:
+    # Revalidation seulement si la valeur parsée de cache_key existe encore: sur 304 (sans
+    # corps), l'appelant la reconduit telle quelle, sans téléchargement ni parsing.
+    # Après un échec (exception, statut autre que 200/304), les validateurs sont oubliés: la
+    # valeur en cache peut être un repli d'erreur (NBC met [] en cache) qu'un 304 ne doit pas
+    # reconduire; le prochain appel retélécharge la page en entier.
+    headers = _UPSTREAM_VALIDATORS.get(url) if cache_key in _TTL_CACHE else None
+    try:
+        resp = _SESSION.get(url, headers=headers, timeout=timeout)
+    except requests.RequestException:
+        _UPSTREAM_VALIDATORS.pop(url, None)
+        raise
+    if resp.status_code == 200:
+        validators = {
+            conditional: resp.headers[validator]
+            for validator, conditional in (("ETag", "If-None-Match"), ("Last-Modified", "If-Modified-Since"))
+            if resp.headers.get(validator)
+        }
+        _PENDING_VALIDATORS[cache_key] = (url, validators)
+    elif resp.status_code != 304:
+        _UPSTREAM_VALIDATORS.pop(url, None)
+    return resp
+
+
+def _previous_value(cache_key: str) -> Any:
+    # Dernière valeur chargée, même expirée: seul _get_if_modified peut mener à un 304, et il
+    # n'envoie ses en-têtes conditionnels que si cette valeur existe.
+    return _TTL_CACHE[cache_key][1]
+
+
+# ============================================================
+#                 RÉPONSES HTTP CONDITIONNELLES
+# ============================================================
+
+def _opaque_etag(etag: str) -> str:
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    # If-None-Match se compare en mode faible (RFC 9110): le préfixe W/ est ignoré des deux côtés.
+    inm = request.headers.get("if-none-match")
+    if not inm:
+        return False
+    etag = _opaque_etag(etag)
+    return inm.strip() == "*" or etag in (_opaque_etag(t.strip()) for t in inm.split(","))
+
+
+def _body_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+
+
+def _negotiate_encoding(request: Request, supported: Tuple[str, ...]) -> str:
+    # Premier codage de `supported` (ordre de préférence serveur) accepté avec q > 0.
+    accepted: Dict[str, float] = {}
+    for part in request.headers.get("accept-encoding", "").split(","):
+        coding, _, params = part.partition(";")
+        params = params.strip()
+        try:
+            q = float(params[2:]) if params.startswith("q=") else 1.0
+        except ValueError:
+            q = 0.0
+        accepted[coding.strip().lower()] = q
+    for coding in supported:
+        if accepted.get(coding, accepted.get("*", 0.0)) > 0:
+            return coding
+    return "identity"
+
+
+def _conditional_response(
+    request: Request,
+    body: bytes,
+    media_type: str,
+    max_age: int,
+    etag: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None,
+    stale_while_revalidate: int = 0,
+    immutable: bool = False,
+) -> Response:
+    # ETag = hash du corps (précalculé si le corps est figé): un client qui a déjà cette version reçoit un 304 sans corps.
+    if etag is None:
+        etag = _body_etag(body)
+    if immutable:
+        cache_control = f"public, max-age={max_age}, immutable"
+    elif stale_while_revalidate:
+        # Copie périmée servie immédiatement pendant que le navigateur revalide en arrière-plan.
+        cache_control = f"public, max-age={max_age}, stale-while-revalidate={stale_while_revalidate}"
+    else:
+        # must-revalidate: une fois périmée, la copie n'est plus servie sans revalidation (304 en général).
+        cache_control = f"public, max-age={max_age}, must-revalidate"
+    headers = {**(headers or {}), "ETag": etag, "Cache-Control": cache_control}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+def _json_response(request: Request, payload: Any, max_age: int, **cache_options: Any) -> Response:
+    # Corps dynamique qu'une couche de compression (middleware, proxy) peut encoder sans toucher
+    # à l'ETag: ETag faible (W/), valable quel que soit le Content-Encoding.
+    body = orjson.dumps(payload)
+    return _conditional_response(
+        request, body, "application/json", max_age, etag="W/" + _body_etag(body), **cache_options
+    )
+
+
+_PRECOMPRESSED_ENCODINGS = ("br", "gzip")
+
+
+def _encoded_variants(body: bytes) -> Dict[str, Tuple[bytes, str]]:
+    # Compression au niveau max une seule fois par corps figé. ETag distinct par codage (représentations différentes).
+    etag = _body_etag(body)
+    return {
+        "br": (brotli.compress(body, quality=11), etag[:-1] + '-br"'),
+        "gzip": (gzip.compress(body, compresslevel=9, mtime=0), etag[:-1] + '-gz"'),
+        "identity": (body, etag),
+    }
+
+
+def _encoded_response(
+    request: Request, variants: Dict[str, Tuple[bytes, str]], media_type: str, max_age: int, **cache_options: Any
+) -> Response:
+    encoding = _negotiate_encoding(request, _PRECOMPRESSED_ENCODINGS)
+    body, etag = variants[encoding]
+    # Content-Encoding déjà posé: GZipMiddleware laisse la réponse telle quelle (il n'ajoute
+    # lui-même Vary que sur les réponses non compressées).
+    headers: Dict[str, str] = {}
+    if encoding != "identity":
+        headers = {"Content-Encoding": encoding, "Vary": "Accept-Encoding"}
+    return _conditional_response(request, body, media_type, max_age, etag=etag, headers=headers, **cache_options)
+
 
 # ============================================================
 #                    HELPERS NOM / MATCHING
 # ============================================================
 
 _SUFFIXES = {"jr", "sr", "ii", "iii", "iv", "v"}
+_RE_NON_ALNUM = re.compile(r"[^a-z0-9\s]")
+_RE_WHITESPACE = re.compile(r"\s+")
 
 
+@lru_cache(maxsize=8192)
 def _normalize_str(s: str) -> str:
     s = s or ""
-    s = unicodedata.normalize("NFKD", s)
-    s = "".join(c for c in s if not unicodedata.combining(c))
+    # Chaîne ASCII (cas courant, test O(1)): NFKD et retrait des diacritiques n'y changent rien.
+    if not s.isascii():
+        s = unicodedata.normalize("NFKD", s)
+        s = "".join(c for c in s if not unicodedata.combining(c))
     s = s.lower()
-    s = re.sub(r"[^a-z0-9\s]", " ", s)
-    s = re.sub(r"\s+", " ", s).strip()
+    s = _RE_NON_ALNUM.sub(" ", s)
+    s = _RE_WHITESPACE.sub(" ", s).strip()
     tokens = [t for t in s.split(" ") if t and t not in _SUFFIXES]
     return " ".join(tokens)
 
 
+def _index_injuries_by_name(items: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    index: Dict[str, List[Dict[str, Any]]] = {}
+    for it in items:
+        # Clés internées, comme norm_name du roster: la recherche compare d'abord les pointeurs.
+        index.setdefault(sys.intern(_normalize_str(it.get("player_name", ""))), []).append(it)
+    return index
+
+
+# ============================================================
+#                    HELPERS TABLES HTML
+# ============================================================
+
+# ESPN / CBS / NBC servent de l'UTF-8; sans <meta charset>, lxml supposerait du latin-1.
+_HTML_PARSER = lxml_html.HTMLParser(encoding="utf-8")
+
+_TABLE_HEADERS_XPATH = etree.XPath(".//th")
+_TABLE_ROWS_XPATH = etree.XPath(".//tr")
+_ROW_CELLS_XPATH = etree.XPath(".//td")
+
+
+def _cell_text(el: Any) -> str:
+    # Même résultat que BeautifulSoup get_text(strip=True): noeuds texte strippés puis collés.
+    return "".join(t.strip() for t in el.itertext())
+
+
 # ============================================================
 #                       BALLDONTLIE
 # ============================================================
@@ -55,14 +359,15 @@ def _call_balldontlie(path: str, params: Optional[Dict[str, Any]] = None, timeou
     headers = {"Authorization": api_key}
 
     try:
-        resp = requests.get(url, headers=headers, params=params or {}, timeout=timeout)
+        resp = _SESSION.get(url, headers=headers, params=params or {}, timeout=timeout)
     except requests.RequestException as e:
         raise HTTPException(status_code=502, detail=f"Error calling BallDontLie: {e}")
 
     if resp.status_code != 200:
         raise HTTPException(status_code=resp.status_code, detail=f"BallDontLie error: {resp.text[:200]}")
 
-    return resp.json()
+    # Bytes bruts décodés par orjson: ni détection de charset ni json stdlib.
+    return orjson.loads(resp.content)
 
 
 def _map_bdl_player(p: Dict[str, Any]) -> Dict[str, Any]:
@@ -122,41 +427,154 @@ ACTIVE_PLAYERS: List[Dict[str, Any]] = []
 ACTIVE_PLAYERS_BY_ID: Dict[int, Dict[str, Any]] = {}
 ACTIVE_PLAYERS_LOADED: bool = False
 
+# Recherche par préfixe: (noms normalisés triés, position de chacun dans le roster, roster,
+# vue réduite du roster avec les seuls champs lus par le widget). Un seul tuple, rebindé d'un
+# bloc: un lecteur ne mélange jamais les listes de deux rechargements.
+ACTIVE_PLAYERS_PREFIX_INDEX: Tuple[List[str], List[int], List[Dict[str, Any]], List[Dict[str, Any]]] = ([], [], [], [])
+# Réponses complètes de /players/active/local, sérialisées une fois par rafraîchissement.
+# Réponses /players/active/local précompressées (br, gzip, identity) à chaque rechargement.
+ACTIVE_PLAYERS_JSON_VARIANTS: Dict[str, Tuple[bytes, str]] = {}
+ACTIVE_PLAYERS_COMPACT_JSON_VARIANTS: Dict[str, Tuple[bytes, str]] = {}
 
-def _load_active_players() -> None:
-    global ACTIVE_PLAYERS, ACTIVE_PLAYERS_BY_ID, ACTIVE_PLAYERS_LOADED
-    if ACTIVE_PLAYERS_LOADED:
+# Rafraîchissement périodique: les joueurs ajoutés en cours de saison apparaissent sans redémarrage.
+ACTIVE_PLAYERS_REFRESH_SECONDS = int(os.getenv("ACTIVE_PLAYERS_REFRESH_SECONDS", "3600"))
+
+# Copie disque du roster: un redémarrage relit un fichier au lieu de repaginer BallDontLie.
+ACTIVE_PLAYERS_CACHE_PATH = os.getenv("ACTIVE_PLAYERS_CACHE_PATH", "/tmp/active_players.json")
+ACTIVE_PLAYERS_CACHE_TTL = int(os.getenv("ACTIVE_PLAYERS_CACHE_TTL", "86400"))
+
+
+_ACTIVE_PLAYERS_LOCK = threading.Lock()
+
+
+def _load_active_players(force: bool = False) -> None:
+    if ACTIVE_PLAYERS_LOADED and not force:
         return
 
+    # Un seul chargement à la fois: au démarrage à froid, les requêtes concurrentes
+    # attendent la pagination en cours au lieu de la relancer chacune.
+    with _ACTIVE_PLAYERS_LOCK:
+        if ACTIVE_PLAYERS_LOADED and not force:
+            return
+
+        players = None if force else _read_active_players_disk_cache()
+        if players is None:
+            players = _fetch_active_players()
+            _write_active_players_disk_cache(players)
+        _set_active_players(players)
+
+
+def _read_active_players_disk_cache() -> Optional[List[Dict[str, Any]]]:
+    try:
+        if time.time() - os.path.getmtime(ACTIVE_PLAYERS_CACHE_PATH) > ACTIVE_PLAYERS_CACHE_TTL:
+            return None
+        with open(ACTIVE_PLAYERS_CACHE_PATH, "rb") as f:
+            players = orjson.loads(f.read())
+    except (OSError, ValueError):
+        return None
+    return players or None
+
+
+def _write_active_players_disk_cache(players: List[Dict[str, Any]]) -> None:
+    # Fichier temporaire propre au processus (plusieurs workers uvicorn rafraîchissent en même
+    # temps): chacun écrit le sien puis os.replace l'installe de façon atomique.
+    tmp_path = f"{ACTIVE_PLAYERS_CACHE_PATH}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps(players))
+        os.replace(tmp_path, ACTIVE_PLAYERS_CACHE_PATH)
+    except OSError as e:
+        logger.warning("Could not write active players cache: %s", e)
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def _fetch_active_players() -> List[Dict[str, Any]]:
     players: List[Dict[str, Any]] = []
-    by_id: Dict[int, Dict[str, Any]] = {}
 
-    cursor: Optional[int] = None
+    # Pagination par curseur uniquement (pas de total_pages): on lance la page
+    # suivante dès que le curseur est connu, pendant le mapping de la page courante.
+    resp = _call_balldontlie("/v1/players/active", params={"per_page": 100})
     while True:
-        params: Dict[str, Any] = {"per_page": 100}
-        if cursor is not None:
-            params["cursor"] = cursor
-
-        resp = _call_balldontlie("/v1/players/active", params=params)
         data = resp.get("data", []) or []
         meta = resp.get("meta", {}) or {}
 
+        cursor = meta.get("next_cursor")
+        next_page = None
+        if cursor:
+            next_page = _IO_POOL.submit(
+                _call_balldontlie, "/v1/players/active", {"per_page": 100, "cursor": cursor}
+            )
+
         for p in data:
             mapped = _map_bdl_player(p)
+            # Même normalisation que norm() côté JS: le widget filtre directement sur ce champ.
+            mapped["norm_name"] = _normalize_str(mapped.get("full_name") or "")
             players.append(mapped)
-            pid = mapped.get("id")
-            if pid is not None:
-                by_id[int(pid)] = mapped
 
-        cursor = meta.get("next_cursor")
-        if not cursor:
+        if next_page is None:
             break
+        resp = next_page.result()
+
+    return players
+
+
+def _compact_player_view(p: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": p.get("id"),
+        "full_name": p.get("full_name"),
+        "norm_name": p.get("norm_name"),
+        "abbr": (p.get("team") or {}).get("abbreviation"),
+        "position": p.get("position"),
+    }
+
+
+def _set_active_players(players: List[Dict[str, Any]]) -> None:
+    global ACTIVE_PLAYERS, ACTIVE_PLAYERS_BY_ID, ACTIVE_PLAYERS_LOADED
+    global ACTIVE_PLAYERS_PREFIX_INDEX, ACTIVE_PLAYERS_JSON_VARIANTS, ACTIVE_PLAYERS_COMPACT_JSON_VARIANTS
+
+    by_id: Dict[int, Dict[str, Any]] = {}
+    norm_names: List[str] = []
+
+    for mapped in players:
+        pid = mapped.get("id")
+        if pid is not None:
+            by_id[int(pid)] = mapped
+
+        # Interné une fois par rechargement (le cache disque le relit comme une nouvelle chaîne).
+        norm = mapped["norm_name"] = sys.intern(mapped["norm_name"])
+        norm_names.append(norm)
+
+    # Nouvelles structures construites à part puis rebindées: les lecteurs ne voient jamais un état partiel.
+    order = sorted(range(len(norm_names)), key=norm_names.__getitem__)
+
+    compact = [_compact_player_view(p) for p in players]
+    full_json = _encoded_variants(orjson.dumps({"source": "balldontlie", "count": len(players), "players": players}))
+    compact_json = _encoded_variants(orjson.dumps({"source": "balldontlie", "count": len(compact), "players": compact}))
 
     ACTIVE_PLAYERS = players
     ACTIVE_PLAYERS_BY_ID = by_id
+    ACTIVE_PLAYERS_PREFIX_INDEX = ([norm_names[i] for i in order], order, players, compact)
+    ACTIVE_PLAYERS_JSON_VARIANTS = full_json
+    ACTIVE_PLAYERS_COMPACT_JSON_VARIANTS = compact_json
     ACTIVE_PLAYERS_LOADED = True
 
 
+def _refresh_active_players_forever() -> None:
+    # Premier passage: le cache disque suffit s'il est frais; ensuite, rechargement API.
+    force = False
+    while True:
+        try:
+            _load_active_players(force=force)
+        except Exception as e:
+            # Le lazy-load de _get_player_from_cache reste le filet de sécurité.
+            logger.warning("Active players refresh failed: %s", e)
+        force = True
+        time.sleep(ACTIVE_PLAYERS_REFRESH_SECONDS)
+
+
 def _get_player_from_cache(player_id: int) -> Dict[str, Any]:
     _load_active_players()
     p = ACTIVE_PLAYERS_BY_ID.get(int(player_id))
@@ -165,22 +583,63 @@ def _get_player_from_cache(player_id: int) -> Dict[str, Any]:
     return p
 
 
-def _get_bdl_injuries_for_player_id(player_id: int) -> List[Dict[str, Any]]:
-    raw = _call_balldontlie("/v1/player_injuries", params={"per_page": 100})
-    data = raw.get("data", []) or []
+def _search_active_players_by_prefix(prefix: str, limit: int, compact: bool = False) -> List[Dict[str, Any]]:
+    _load_active_players()
+    nprefix = _normalize_str(prefix)
+    if not nprefix:
+        return []
+
+    # Une seule lecture du global: positions et roster viennent du même rechargement.
+    norms, positions, full, compact_view = ACTIVE_PLAYERS_PREFIX_INDEX
+    players = compact_view if compact else full
+    hits: List[Dict[str, Any]] = []
+    i = bisect_left(norms, nprefix)
+    while i < len(norms) and len(hits) < limit and norms[i].startswith(nprefix):
+        hits.append(players[positions[i]])
+        i += 1
+    return hits
+
+
+def _load_bdl_injuries() -> Dict[Any, List[Dict[str, Any]]]:
+    # Toutes les pages, curseur suivi jusqu'au bout: chaque joueur blessé est dans la liste et
+    # une requête joueur n'appelle jamais BallDontLie (chargement en arrière-plan).
+    by_player: Dict[Any, List[Dict[str, Any]]] = {}
+    params: Dict[str, Any] = {"per_page": 100}
+    while True:
+        data = _call_balldontlie("/v1/player_injuries", params=params)
+        # Blessures déjà mappées et groupées par joueur: la requête par joueur devient un accès dict.
+        for item in data.get("data") or []:
+            by_player.setdefault((item.get("player") or {}).get("id"), []).append(_map_bdl_injury(item))
+        cursor = (data.get("meta") or {}).get("next_cursor")
+        if not cursor:
+            return by_player
+        params = {"per_page": 100, "cursor": cursor}
+
+
+def _get_bdl_injuries(force: bool = False) -> Dict[Any, List[Dict[str, Any]]]:
+    # Liste partagée entre joueurs (une seule pagination par TTL), rafraîchie en arrière-plan.
+    return _cached("bdl:injuries", _load_bdl_injuries, force=force)
 
-    out: List[Dict[str, Any]] = []
-    for item in data:
-        pl = (item.get("player") or {})
-        if pl.get("id") == player_id:
-            out.append(_map_bdl_injury(item))
-    return out
+
+def _get_bdl_injuries_for_player_id(player_id: int) -> List[Dict[str, Any]]:
+    return _get_bdl_injuries().get(player_id, [])
 
 
 @app.get("/players/active/local")
-def players_active_local() -> Dict[str, Any]:
+def players_active_local(
+    request: Request,
+    prefix: Optional[str] = Query(None, max_length=64),
+    limit: int = Query(20, ge=1, le=100),
+    compact: bool = False,
+) -> Response:
+    if prefix is not None:
+        hits = _search_active_players_by_prefix(prefix, limit, compact)
+        return _json_response(request, {"source": "balldontlie", "count": len(hits), "players": hits}, max_age=300)
+
     _load_active_players()
-    return {"source": "balldontlie", "count": len(ACTIVE_PLAYERS), "players": ACTIVE_PLAYERS}
+    variants = ACTIVE_PLAYERS_COMPACT_JSON_VARIANTS if compact else ACTIVE_PLAYERS_JSON_VARIANTS
+    # Roster rafraîchi au plus une fois par heure; compressé au rechargement, pas à chaque requête.
+    return _encoded_response(request, variants, "application/json", max_age=3600)
 
 
 # ============================================================
@@ -188,60 +647,59 @@ def players_active_local() -> Dict[str, Any]:
 # ============================================================
 
 ESPN_INJURIES_URL = "https://www.espn.com/nba/injuries"
+_ESPN_WANTED_HEADERS = frozenset({"NAME", "POS", "EST. RETURN DATE", "STATUS", "COMMENT"})
 
 
-def _fetch_espn_html() -> str:
+def _fetch_espn_html() -> Optional[bytes]:
     try:
-        resp = requests.get(ESPN_INJURIES_URL, timeout=12, headers={"User-Agent": "Mozilla/5.0"})
+        resp = _get_if_modified(ESPN_INJURIES_URL, "espn", timeout=12)
     except requests.RequestException as e:
         raise HTTPException(status_code=502, detail=f"Error calling ESPN: {e}")
 
+    if resp.status_code == 304:
+        return None
     if resp.status_code != 200:
         raise HTTPException(status_code=resp.status_code, detail=f"ESPN error: {resp.text[:200]}")
 
-    return resp.text
+    # Bytes bruts: pas de détection de charset ni de décodage Python avant lxml.
+    return resp.content
 
 
-def _parse_espn_injuries(html: str) -> List[Dict[str, Any]]:
-    soup = BeautifulSoup(html, "html.parser")
+def _parse_espn_injuries(html: bytes) -> List[Dict[str, Any]]:
+    doc = lxml_html.fromstring(html, parser=_HTML_PARSER)
     results: List[Dict[str, Any]] = []
 
-    tables = soup.find_all("table")
-    for table in tables:
-        headers = [th.get_text(strip=True) for th in table.find_all("th")]
+    for table in doc.iter("table"):
+        headers = [_cell_text(th) for th in _TABLE_HEADERS_XPATH(table)]
         if not headers:
             continue
 
-        wanted = ["NAME", "POS", "EST. RETURN DATE", "STATUS", "COMMENT"]
-        if not all(h in headers for h in wanted):
+        if not _ESPN_WANTED_HEADERS.issubset(headers):
             continue
 
-        idx_name = headers.index("NAME")
-        idx_pos = headers.index("POS")
-        idx_return = headers.index("EST. RETURN DATE")
-        idx_status = headers.index("STATUS")
-        idx_comment = headers.index("COMMENT")
+        indices = [headers.index(h) for h in ("NAME", "POS", "EST. RETURN DATE", "STATUS", "COMMENT")]
+        # Seules les 5 cellules utiles sont lues; une ligne trop courte pour les contenir est ignorée.
+        pick_cells = itemgetter(*indices)
+        min_cells = max(indices) + 1
 
-        for row in table.find_all("tr"):
-            cells = row.find_all("td")
-            if len(cells) < 5:
+        for row in _TABLE_ROWS_XPATH(table):
+            cells = _ROW_CELLS_XPATH(row)
+            if len(cells) < min_cells:
                 continue
 
-            name = cells[idx_name].get_text(strip=True)
-            pos = cells[idx_pos].get_text(strip=True)
-            est_return = cells[idx_return].get_text(strip=True)
-            status = cells[idx_status].get_text(strip=True)
-            comment = cells[idx_comment].get_text(strip=True)
+            name, pos, est_return, status, comment = map(_cell_text, pick_cells(cells))
 
             if not name or name.upper() == "NAME":
                 continue
 
+            # Poste et statut: une poignée de valeurs ("G", "Out"...) répétées sur chaque ligne
+            # gardée en cache; internées, elles ne sont stockées qu'une fois.
             results.append(
                 {
                     "player_name": name,
-                    "position": pos,
+                    "position": sys.intern(pos),
                     "est_return_date": est_return,
-                    "status": status,
+                    "status": sys.intern(status),
                     "comment": comment,
                     "source": "espn",
                 }
@@ -250,70 +708,84 @@ def _parse_espn_injuries(html: str) -> List[Dict[str, Any]]:
     return results
 
 
+def _load_espn_index() -> Tuple[int, Dict[str, List[Dict[str, Any]]]]:
+    html = _fetch_espn_html()
+    if html is None:
+        return _previous_value("espn")
+    items = _parse_espn_injuries(html)
+    return len(items), _index_injuries_by_name(items)
+
+
+def _get_espn_index(force: bool = False) -> Tuple[int, Dict[str, List[Dict[str, Any]]]]:
+    return _cached("espn", _load_espn_index, force=force)
+
+
 # ============================================================
 #                            CBS
 # ============================================================
 
 CBS_INJURIES_URL = "https://www.cbssports.com/nba/injuries/"
+_CBS_WANTED_HEADERS = frozenset({"Player", "Position", "Updated", "Injury", "Injury Status"})
 
 
-def _fetch_cbs_html() -> str:
+def _fetch_cbs_html() -> Optional[bytes]:
     try:
-        resp = requests.get(CBS_INJURIES_URL, timeout=12, headers={"User-Agent": "Mozilla/5.0"})
+        resp = _get_if_modified(CBS_INJURIES_URL, "cbs", timeout=12)
     except requests.RequestException as e:
         raise HTTPException(status_code=502, detail=f"Error calling CBS: {e}")
 
+    if resp.status_code == 304:
+        return None
     if resp.status_code != 200:
         raise HTTPException(status_code=resp.status_code, detail=f"CBS error: {resp.text[:200]}")
 
-    return resp.text
+    return resp.content
+
+
+def _latin_char_class(pred: Callable[[str], bool]) -> str:
+    # Latin de base + Latin-1 + étendu A/B: couvre les noms NBA (Dončić, Porziņģis...).
+    return "".join(re.escape(chr(c)) for c in range(0x250) if pred(chr(c)))
+
+
+# Frontière minuscule -> majuscule ("L. DončićLuka Dončić"), comme islower()/isupper().
+_CBS_NAME_SPLIT_RE = re.compile(
+    f"[{_latin_char_class(str.islower)}](?=[{_latin_char_class(str.isupper)}])"
+)
 
 
 def _clean_cbs_player_name(raw: str) -> str:
     s = (raw or "").strip()
-    split_idx = None
-    for i in range(1, len(s)):
-        if s[i - 1].islower() and s[i].isupper():
-            split_idx = i
-            break
-    if split_idx is not None:
-        full = s[split_idx:].strip()
+    m = _CBS_NAME_SPLIT_RE.search(s)
+    if m:
+        full = s[m.end():].strip()
         if full:
             return full
     return s
 
 
-def _parse_cbs_injuries(html: str) -> List[Dict[str, Any]]:
-    soup = BeautifulSoup(html, "html.parser")
+def _parse_cbs_injuries(html: bytes) -> List[Dict[str, Any]]:
+    doc = lxml_html.fromstring(html, parser=_HTML_PARSER)
     results: List[Dict[str, Any]] = []
 
-    tables = soup.find_all("table")
-    for table in tables:
-        headers = [th.get_text(strip=True) for th in table.find_all("th")]
+    for table in doc.iter("table"):
+        headers = [_cell_text(th) for th in _TABLE_HEADERS_XPATH(table)]
         if not headers:
             continue
 
-        wanted = ["Player", "Position", "Updated", "Injury", "Injury Status"]
-        if not all(h in headers for h in wanted):
+        if not _CBS_WANTED_HEADERS.issubset(headers):
             continue
 
-        idx_name = headers.index("Player")
-        idx_pos = headers.index("Position")
-        idx_updated = headers.index("Updated")
-        idx_injury = headers.index("Injury")
-        idx_status = headers.index("Injury Status")
+        indices = [headers.index(h) for h in ("Player", "Position", "Updated", "Injury", "Injury Status")]
+        pick_cells = itemgetter(*indices)
+        min_cells = max(indices) + 1
 
-        for row in table.find_all("tr"):
-            cells = row.find_all("td")
-            if len(cells) < 5:
+        for row in _TABLE_ROWS_XPATH(table):
+            cells = _ROW_CELLS_XPATH(row)
+            if len(cells) < min_cells:
                 continue
 
-            raw_name = cells[idx_name].get_text(strip=True)
+            raw_name, pos, updated, injury, status = map(_cell_text, pick_cells(cells))
             name = _clean_cbs_player_name(raw_name)
-            pos = cells[idx_pos].get_text(strip=True)
-            updated = cells[idx_updated].get_text(strip=True)
-            injury = cells[idx_injury].get_text(strip=True)
-            status = cells[idx_status].get_text(strip=True)
 
             if not name or name.upper() == "PLAYER":
                 continue
@@ -321,10 +793,10 @@ def _parse_cbs_injuries(html: str) -> List[Dict[str, Any]]:
             results.append(
                 {
                     "player_name": name,
-                    "position": pos,
+                    "position": sys.intern(pos),
                     "updated": updated,
                     "injury": injury,
-                    "status": status,
+                    "status": sys.intern(status),
                     "source": "cbs",
                 }
             )
@@ -332,6 +804,18 @@ def _parse_cbs_injuries(html: str) -> List[Dict[str, Any]]:
     return results
 
 
+def _load_cbs_index() -> Tuple[int, Dict[str, List[Dict[str, Any]]]]:
+    html = _fetch_cbs_html()
+    if html is None:
+        return _previous_value("cbs")
+    items = _parse_cbs_injuries(html)
+    return len(items), _index_injuries_by_name(items)
+
+
+def _get_cbs_index(force: bool = False) -> Tuple[int, Dict[str, List[Dict[str, Any]]]]:
+    return _cached("cbs", _load_cbs_index, force=force)
+
+
 # ============================================================
 #                      NBC (optionnel / best effort)
 # ============================================================
@@ -373,24 +857,77 @@ TEAM_SLUG_BY_ABBR = {
     "WAS": "washington-wizards",
 }
 
-TEAM_ABBRS = set(TEAM_SLUG_BY_ABBR.keys())
+TEAM_ABBRS = frozenset(TEAM_SLUG_BY_ABBR)
+
+# Sentinelles NBC calculées une fois (déjà sous forme normalisée).
+_NBC_SENTINEL_NORM = "link copied to clipboard"
+_NBC_SENTINEL_HINT = "clipboard"
+_NBC_SENTINEL_RE = re.compile(r"(?i).*link copied to clipboard!?")
+_NBC_HEADER_PREFIXES = frozenset({"injury", "recap", "transaction", "headline"})
+
+
+class _NBCTextCollector:
+    # Cible SAX lxml: garde les textes visibles strippés (ni script/style/template, ni
+    # commentaires) sans construire d'arbre. Un même noeud texte peut arriver en plusieurs
+    # appels data(): il est recollé jusqu'à la prochaine balise ou au prochain commentaire.
+    _SKIPPED_TAGS = frozenset({"script", "style", "template"})
+
+    def __init__(self) -> None:
+        self.lines: List[str] = []
+        self._chunks: List[str] = []
+        self._skip_depth = 0
 
+    def _flush(self) -> None:
+        if self._chunks:
+            text = "".join(self._chunks)
+            self._chunks.clear()
+            # Comme get_text("\n").split("\n"): un noeud texte sur plusieurs lignes en donne plusieurs.
+            self.lines.extend(line for line in map(str.strip, text.splitlines()) if line)
 
-def _fetch_nbc_html(url: str) -> str:
+    def start(self, tag: str, attrib: Dict[str, str]) -> None:
+        self._flush()
+        if tag in self._SKIPPED_TAGS:
+            self._skip_depth += 1
+
+    def end(self, tag: str) -> None:
+        self._flush()
+        if tag in self._SKIPPED_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+
+    def data(self, data: str) -> None:
+        if not self._skip_depth:
+            self._chunks.append(data)
+
+    def comment(self, text: str) -> None:
+        self._flush()
+
+    def close(self) -> List[str]:
+        self._flush()
+        return self.lines
+
+
+def _nbc_text_lines(html: bytes) -> List[str]:
+    # Parseur propre à chaque appel: un parseur lxml à cible n'est pas partageable entre threads.
+    return etree.fromstring(html, etree.HTMLParser(target=_NBCTextCollector(), encoding="utf-8"))
+
+
+def _fetch_nbc_html(url: str) -> Optional[bytes]:
     try:
-        resp = requests.get(url, timeout=15, headers={"User-Agent": "Mozilla/5.0"})
+        resp = _get_if_modified(url, f"nbc:{url}", timeout=15)
     except requests.RequestException:
-        return ""
+        return b""
+    if resp.status_code == 304:
+        return None
     if resp.status_code != 200:
-        return ""
-    return resp.text
+        return b""
+    return resp.content
 
 
 def _parse_nbc_player_header_from_tokens(tokens: List[str]) -> Tuple[Optional[str], Optional[str], Optional[str]]:
     if not tokens:
         return None, None, None
 
-    while tokens and tokens[0].lower() in {"injury", "recap", "transaction", "headline"}:
+    while tokens and tokens[0].lower() in _NBC_HEADER_PREFIXES:
         tokens = tokens[1:]
 
     team_idx = None
@@ -413,85 +950,126 @@ def _parse_nbc_player_header_from_tokens(tokens: List[str]) -> Tuple[Optional[st
     return full_name, team_abbr, position
 
 
-def _extract_nbc_matches_from_html(html: str, target_full_name: str, max_items: int = 1) -> List[Dict[str, Any]]:
+def _parse_nbc_news(html: bytes) -> List[Tuple[str, Dict[str, str]]]:
+    # Toutes les news de la page, avec le nom normalisé du joueur en en-tête: parsé une
+    # fois par TTL, chaque requête joueur ne fait plus qu'une comparaison de chaînes.
     if not html:
         return []
 
-    soup = BeautifulSoup(html, "html.parser")
-    text = soup.get_text("\n", strip=True)
-    lines = [l for l in text.split("\n") if l.strip()]
-
-    target_norm = _normalize_str(target_full_name)
-    matches: List[Dict[str, Any]] = []
-
-    for idx, line in enumerate(lines):
-        nline = _normalize_str(line)
-        if "link copied to clipboard" not in nline:
-            continue
-
-        remainder = re.sub(r"(?i).*link copied to clipboard!?", "", line).strip()
+    # Une seule passe SAX: lignes strippées et non vides, sans arbre ni texte géant re-découpé.
+    lines = _nbc_text_lines(html)
+    # Positions de la sentinelle repérées en une passe; seules les lignes candidates
+    # (ASCII contenant le mot-clé, ou non-ASCII) passent par la normalisation complète.
+    anchors = [
+        i
+        for i, l in enumerate(lines)
+        if (_NBC_SENTINEL_HINT in l.lower() or not l.isascii()) and _NBC_SENTINEL_NORM in _normalize_str(l)
+    ]
+
+    news: List[Tuple[str, Dict[str, str]]] = []
+
+    for idx, next_anchor in zip(anchors, anchors[1:] + [len(lines)]):
+        line = lines[idx]
+        remainder = _NBC_SENTINEL_RE.sub("", line).strip()
         tokens = remainder.split()
 
         if not tokens:
-            lookahead = []
-            for j in range(idx + 1, min(idx + 8, len(lines))):
-                if "link copied to clipboard" in _normalize_str(lines[j]):
-                    break
-                lookahead.append(lines[j])
-            tokens = " ".join(lookahead).split()
+            # Le lookahead s'arrête à la sentinelle suivante.
+            tokens = " ".join(lines[idx + 1:min(idx + 8, next_anchor)]).split()
 
         header_name, header_abbr, header_pos = _parse_nbc_player_header_from_tokens(tokens)
         if not header_name:
             continue
 
-        if _normalize_str(header_name) != target_norm:
-            continue
-
         prev = lines[max(0, idx - 10):idx]
-        summary_text = re.sub(r"\s+", " ", " ".join(prev)).strip()
+        summary_text = _RE_WHITESPACE.sub(" ", " ".join(prev)).strip()
         if len(summary_text) > 450:
             summary_text = summary_text[-450:]
 
-        matches.append(
-            {
-                "headline": f"{header_name} {header_abbr} {header_pos or ''}".strip(),
-                "summary": summary_text,
-            }
+        news.append(
+            (
+                sys.intern(_normalize_str(header_name)),
+                {
+                    "headline": f"{header_name} {header_abbr} {header_pos or ''}".strip(),
+                    "summary": summary_text,
+                },
+            )
         )
 
-        if len(matches) >= max_items:
-            break
+    return news
+
 
-    return matches
+def _load_nbc_news(url: str) -> List[Tuple[str, Dict[str, str]]]:
+    html = _fetch_nbc_html(url)
+    if html is None:
+        return _previous_value(f"nbc:{url}")
+    return _parse_nbc_news(html)
 
 
-def _find_nbc_news_for_player(player: Dict[str, Any], max_items: int = 1) -> Tuple[List[Dict[str, Any]], List[str]]:
-    full_name = player.get("full_name") or ""
+def _get_nbc_news(url: str) -> List[Tuple[str, Dict[str, str]]]:
+    # Un échec (page vide) est mis en cache aussi: inutile de re-subir un timeout NBC à chaque requête.
+    return _cached(f"nbc:{url}", lambda: _load_nbc_news(url))
+
+
+def _nbc_team_url(player: Dict[str, Any]) -> Optional[str]:
     team = player.get("team") or {}
-    abbr = (team.get("abbreviation") or "").upper()
+    slug = TEAM_SLUG_BY_ABBR.get((team.get("abbreviation") or "").upper())
+    return NBC_TEAM_PLAYER_NEWS_TEMPLATE.format(team_slug=slug) if slug else None
+
 
+def _find_nbc_news_for_player(
+    player: Dict[str, Any],
+    max_items: int = 1,
+    get_news: Callable[[str], List[Tuple[str, Dict[str, str]]]] = _get_nbc_news,
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    target_norm = player.get("norm_name") or _normalize_str(player.get("full_name") or "")
     attempted: List[str] = []
     urls: List[str] = []
 
-    slug = TEAM_SLUG_BY_ABBR.get(abbr)
-    if slug:
-        urls.append(NBC_TEAM_PLAYER_NEWS_TEMPLATE.format(team_slug=slug))
+    team_url = _nbc_team_url(player)
+    if team_url:
+        urls.append(team_url)
     urls.append(NBC_NBA_PLAYER_NEWS_URL)
     urls.append(NBC_FANTASY_PLAYER_NEWS_URL)
 
     for url in urls:
         attempted.append(url)
-        html = _fetch_nbc_html(url)
-        items = _extract_nbc_matches_from_html(html, full_name, max_items=max_items)
+        items = [
+            {**item, "url": url, "source": "nbc"}
+            for header_norm, item in get_news(url)
+            if header_norm == target_norm
+        ][:max_items]
         if items:
-            for it in items:
-                it["url"] = url
-                it["source"] = "nbc"
             return items, attempted
 
     return [], attempted
 
 
+# ============================================================
+#              RAFRAÎCHISSEMENT DES SOURCES PARTAGÉES
+# ============================================================
+
+# Rechargées avant l'expiration du TTL: les requêtes trouvent toujours un index chaud.
+INJURIES_REFRESH_SECONDS = int(os.getenv("INJURIES_REFRESH_SECONDS", str(max(INJURIES_CACHE_TTL * 3 // 4, 1))))
+_SHARED_SOURCES: Dict[str, Callable[..., Any]] = {
+    "espn": _get_espn_index,
+    "cbs": _get_cbs_index,
+    "balldontlie": _get_bdl_injuries,
+}
+
+
+def _refresh_injury_sources_forever() -> None:
+    while True:
+        futures = {name: _IO_POOL.submit(load, force=True) for name, load in _SHARED_SOURCES.items()}
+        for name, future in futures.items():
+            try:
+                future.result()
+            except Exception as e:
+                # La valeur précédente reste servie jusqu'à son TTL, puis chargement à la demande.
+                logger.warning("%s refresh failed: %s", name, e)
+        time.sleep(INJURIES_REFRESH_SECONDS)
+
+
 # ============================================================
 #                  ENDPOINTS API (JSON)
 # ============================================================
@@ -506,502 +1084,248 @@ def root():
     return {"message": "NBA injuries API is running"}
 
 
-@app.get("/injuries/by-player-id")
-def injuries_by_player_id(player_id: int) -> Dict[str, Any]:
-    p = _get_player_from_cache(player_id)
-    full_name = p.get("full_name") or ""
-    player_norm = _normalize_str(full_name)
+# Ordre d'affichage, repris dans "sources" et "sources_with_info".
+INJURY_SOURCES = ("balldontlie", "espn", "cbs", "nbc")
+_SOURCES_QUERY = Query(
+    None,
+    max_length=64,
+    description="Comma-separated subset of balldontlie, espn, cbs, nbc (default: all).",
+)
+
+
+def _parse_injury_sources(sources: Optional[str]) -> frozenset:
+    if sources is None:
+        return frozenset(INJURY_SOURCES)
+    wanted = frozenset(s.strip().lower() for s in sources.split(",") if s.strip())
+    unknown = wanted.difference(INJURY_SOURCES)
+    if unknown or not wanted:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid sources: {sources!r} (expected a subset of {', '.join(INJURY_SOURCES)})",
+        )
+    return wanted
 
-    espn_all = _parse_espn_injuries(_fetch_espn_html())
-    espn_matches = [it for it in espn_all if _normalize_str(it.get("player_name", "")) == player_norm]
 
-    cbs_all = _parse_cbs_injuries(_fetch_cbs_html())
-    cbs_matches = [it for it in cbs_all if _normalize_str(it.get("player_name", "")) == player_norm]
+def _future_result(future: Optional[Future]) -> Any:
+    return future.result() if future is not None else None
 
-    nbc_matches, nbc_attempted_urls = _find_nbc_news_for_player(p, max_items=1)
 
-    bdl_injuries = _get_bdl_injuries_for_player_id(player_id)
+def _source_error(e: Exception) -> str:
+    return str(e.detail) if isinstance(e, HTTPException) else str(e) or type(e).__name__
 
-    sources_with_info = []
-    if bdl_injuries:
-        sources_with_info.append("balldontlie")
-    if espn_matches:
-        sources_with_info.append("espn")
-    if cbs_matches:
-        sources_with_info.append("cbs")
-    if nbc_matches:
-        sources_with_info.append("nbc")
+
+def _player_injuries_payload(
+    p: Dict[str, Any],
+    espn: Optional[Tuple[int, Dict[str, List[Dict[str, Any]]]]],
+    cbs: Optional[Tuple[int, Dict[str, List[Dict[str, Any]]]]],
+    nbc: Optional[Tuple[List[Dict[str, Any]], List[str]]],
+    bdl_injuries: Optional[List[Dict[str, Any]]],
+    errors: Optional[Dict[str, str]] = None,
+) -> Dict[str, Any]:
+    # Une source non demandée (None) est absente de "sources" comme de l'agrégat. Une source en
+    # échec (errors, par lot) y figure sans blessure, avec le détail de l'erreur.
+    # Nom normalisé précalculé au chargement du roster.
+    player_norm = p["norm_name"]
+    sources: Dict[str, Dict[str, Any]] = {}
+
+    if bdl_injuries is not None:
+        sources["balldontlie"] = {"injuries": bdl_injuries}
+
+    if espn is not None:
+        espn_total, espn_index = espn
+        sources["espn"] = {"injuries": espn_index.get(player_norm, []), "total_injuries_checked": espn_total}
+
+    if cbs is not None:
+        cbs_total, cbs_index = cbs
+        sources["cbs"] = {"injuries": cbs_index.get(player_norm, []), "total_injuries_checked": cbs_total}
+
+    if nbc is not None:
+        nbc_matches, nbc_attempted_urls = nbc
+        sources["nbc"] = {"injuries": nbc_matches, "attempted_urls": nbc_attempted_urls}
+
+    if errors:
+        for name, detail in errors.items():
+            sources[name] = {"injuries": [], "error": detail}
+        sources = {name: sources[name] for name in INJURY_SOURCES if name in sources}
+
+    sources_with_info = [name for name, block in sources.items() if block["injuries"]]
 
     aggregated = {
         "status": "flagged" if sources_with_info else "clear",
         "sources_with_info": sources_with_info,
     }
+    if errors:
+        aggregated["sources_failed"] = [name for name in sources if name in errors]
 
     return {
-        "player_id": player_id,
+        "player_id": p.get("id"),
         "player": p,
         "aggregated": aggregated,
-        "sources": {
-            "balldontlie": {"injuries": bdl_injuries},
-            "espn": {"injuries": espn_matches, "total_injuries_checked": len(espn_all)},
-            "cbs": {"injuries": cbs_matches, "total_injuries_checked": len(cbs_all)},
-            "nbc": {"injuries": nbc_matches, "attempted_urls": nbc_attempted_urls},
-        },
+        "sources": sources,
     }
 
 
+def _player_injuries(p: Dict[str, Any], wanted: frozenset) -> Dict[str, Any]:
+    # Les sources sont indépendantes: latence = la plus lente, pas la somme. Seules
+    # les sources demandées sont lancées.
+    espn_future = _IO_POOL.submit(_get_espn_index) if "espn" in wanted else None
+    cbs_future = _IO_POOL.submit(_get_cbs_index) if "cbs" in wanted else None
+    nbc_future = _IO_POOL.submit(_find_nbc_news_for_player, p, 1) if "nbc" in wanted else None
+    bdl_future = _IO_POOL.submit(_get_bdl_injuries_for_player_id, p["id"]) if "balldontlie" in wanted else None
+
+    return _player_injuries_payload(
+        p,
+        _future_result(espn_future),
+        _future_result(cbs_future),
+        _future_result(nbc_future),
+        _future_result(bdl_future),
+    )
+
+
+@app.get("/injuries/by-player-id")
+def injuries_by_player_id(
+    request: Request,
+    player_id: int = Query(..., gt=0),
+    sources: Optional[str] = _SOURCES_QUERY,
+) -> Response:
+    wanted = _parse_injury_sources(sources)
+    p = _get_player_from_cache(player_id)
+
+    # Rafale sur un même joueur (news qui tombe): une seule série de tâches dans _IO_POOL,
+    # partagée par toutes les requêtes identiques en cours.
+    payload = _single_flight(("injuries", player_id, wanted), lambda: _player_injuries(p, wanted))
+    # Au-delà de 60 s, la copie reste affichable le temps d'une revalidation (304 si rien n'a bougé).
+    return _json_response(request, payload, max_age=60, stale_while_revalidate=300)
+
+
+@app.get("/injuries/by-players")
+def injuries_by_players(
+    request: Request,
+    player_ids: List[conint(gt=0)] = Query(..., min_length=1, max_length=50),
+    sources: Optional[str] = _SOURCES_QUERY,
+) -> Response:
+    wanted = _parse_injury_sources(sources)
+    _load_active_players()
+    by_id = ACTIVE_PLAYERS_BY_ID
+    ids = list(dict.fromkeys(player_ids))
+    players = [by_id[pid] for pid in ids if pid in by_id]
+    not_found = [pid for pid in ids if pid not in by_id]
+
+    # Sources partagées (ESPN, CBS, BallDontLie) lues une seule fois pour tout le lot, et une
+    # seule tâche NBC par page d'équipe: le nombre de tâches ne dépend pas de la taille du lot.
+    shared = {name: _IO_POOL.submit(load) for name, load in _SHARED_SOURCES.items() if name in wanted}
+    nbc_pages: Dict[str, Future] = {}
+    if "nbc" in wanted:
+        for p in players:
+            url = _nbc_team_url(p)
+            if url and url not in nbc_pages:
+                nbc_pages[url] = _IO_POOL.submit(_get_nbc_news, url)
+
+    def nbc_news(url: str) -> List[Tuple[str, Dict[str, str]]]:
+        future = nbc_pages.get(url)
+        if future is None:
+            # Pages de repli (NBA, fantasy): chargées dans ce thread, au plus une fois pour le lot,
+            # échec compris (pas de nouvel essai joueur par joueur).
+            future = nbc_pages[url] = Future()
+            try:
+                future.set_result(_get_nbc_news(url))
+            except Exception as e:
+                future.set_exception(e)
+        return future.result()
+
+    # Une source en échec (429 BallDontLie, ESPN en panne...) est signalée dans chaque joueur
+    # au lieu de faire échouer tout le lot.
+    results: Dict[str, Any] = {}
+    shared_errors: Dict[str, str] = {}
+    for name, future in shared.items():
+        try:
+            results[name] = future.result()
+        except Exception as e:
+            shared_errors[name] = _source_error(e)
+
+    payloads = []
+    for p in players:
+        errors = dict(shared_errors)
+        nbc = None
+        if "nbc" in wanted:
+            try:
+                nbc = _find_nbc_news_for_player(p, 1, nbc_news)
+            except Exception as e:
+                errors["nbc"] = _source_error(e)
+        bdl = results["balldontlie"].get(p["id"], []) if "balldontlie" in results else None
+        payloads.append(_player_injuries_payload(p, results.get("espn"), results.get("cbs"), nbc, bdl, errors))
+    return _json_response(
+        request,
+        {"count": len(payloads), "players": payloads, "not_found": not_found},
+        max_age=60,
+        stale_while_revalidate=300,
+    )
+
+
 # ============================================================
 #                      WIDGET (HTML)
 # ============================================================
 
-WIDGET_HTML_TEMPLATE = r"""<!DOCTYPE html>
-<html lang="fr">
-<head>
-  <meta charset="utf-8" />
-  <title>NBA Injury Checker</title>
-  <meta name="viewport" content="width=device-width, initial-scale=1" />
-  <style>
-    body { margin: 0; padding: 0; background: #020617; color: #e5e7eb; font-family: system-ui, -apple-system, Segoe UI, sans-serif; }
-    * { box-sizing: border-box; }
-    .ia-shell { max-width: 1040px; margin: 0 auto; padding: 28px 12px 40px; }
-    .ia-card { padding: 24px 20px 26px; border-radius: 20px; background: #0b1220; border: 1px solid rgba(148,163,184,.35); }
-    .ia-title { margin: 0 0 6px; font-size: 24px; font-weight: 700; text-transform: uppercase; text-align: center; }
-    .ia-subtitle { margin: 0 0 18px; font-size: 13px; color: #9ca3af; text-align: center; }
-
-    .ia-search-row { display: flex; gap: 8px; margin-bottom: 10px; align-items: center; }
-    .ia-search { flex: 1; display: flex; gap: 10px; position: relative; }
-    .ia-search-input-wrap { flex: 1; position: relative; }
-    #ia-player-input { width: 100%; padding: 11px 12px; border-radius: 10px; border: 1px solid rgba(148,163,184,.65); background: rgba(15,23,42,.96); color: #f9fafb; font-size: 14px; outline: none; }
-    #ia-search-btn { padding: 11px 16px; border-radius: 10px; border: none; background: #3b82f6; color: #fff; font-weight: 700; cursor: pointer; }
-    #ia-search-btn:disabled { opacity: .6; cursor: default; }
-    #ia-reset-btn { padding: 9px 12px; border-radius: 10px; border: 1px solid rgba(148,163,184,.7); background: rgba(15,23,42,.96); color: #e5e7eb; font-size: 12px; cursor: pointer; white-space: nowrap; }
-
-    .ia-suggestions { position: absolute; left: 0; right: 0; top: calc(100% + 4px); max-height: 220px; overflow-y: auto; background: #020617; border-radius: 10px; border: 1px solid rgba(148,163,184,.7); z-index: 50; }
-    .ia-suggestion-item { padding: 7px 10px; font-size: 13px; cursor: pointer; display: flex; justify-content: space-between; gap: 8px; }
-    .ia-suggestion-item:nth-child(2n) { background: rgba(15,23,42,.9); }
-    .ia-suggestion-item:hover { background: rgba(59,130,246,.25); }
-    .ia-suggestion-name { font-weight: 600; }
-    .ia-suggestion-meta { color: #9ca3af; font-size: 12px; }
-
-    .ia-loader { margin: 6px 0 4px; font-size: 13px; display: none; }
-    .ia-error { margin: 8px 0 6px; padding: 8px 10px; border-radius: 8px; background: rgba(248,113,113,.1); border: 1px solid rgba(248,113,113,.7); color: #fecaca; font-size: 13px; display: none; }
-
-    /* FICHE JOUEUR */
-    .ia-player-card {
-      display: none;
-      margin-top: 12px;
-      padding: 12px 12px;
-      border-radius: 14px;
-      background: rgba(15,23,42,.96);
-      border: 1px solid rgba(148,163,184,.6);
-      align-items: center;
-      justify-content: space-between;
-      gap: 12px;
-    }
-    .ia-player-left { display: flex; align-items: center; gap: 10px; }
-    .ia-team-logo {
-      width: 34px;
-      height: 34px;
-      border-radius: 8px;
-      background: #020617;
-      border: 1px solid rgba(148,163,184,.35);
-      object-fit: contain;
-      display: none;
-    }
-    .ia-player-text { display: flex; flex-direction: column; gap: 2px; }
-    .ia-player-name { font-size: 16px; font-weight: 800; color: #f9fafb; }
-    .ia-player-meta { font-size: 12px; color: #9ca3af; }
-    .ia-badge {
-      font-size: 11px;
-      padding: 5px 10px;
-      border-radius: 999px;
-      border: 1px solid rgba(148,163,184,.6);
-      text-transform: uppercase;
-      letter-spacing: .12em;
-      white-space: nowrap;
-    }
-    .ia-badge-clear { background: rgba(34,197,94,.12); border-color: rgba(34,197,94,.45); color: #bbf7d0; }
-    .ia-badge-flagged { background: rgba(239,68,68,.12); border-color: rgba(239,68,68,.45); color: #fecaca; }
-
-    .ia-grid { display: grid; grid-template-columns: repeat(4, minmax(0,1fr)); gap: 12px; margin-top: 12px; }
-    @media (max-width: 900px) { .ia-grid { grid-template-columns: repeat(2, minmax(0,1fr)); } }
-    @media (max-width: 600px) { .ia-grid { grid-template-columns: minmax(0,1fr); } }
-
-    .ia-col { background: rgba(15,23,42,.97); border-radius: 12px; border: 1px solid rgba(148,163,184,.6); overflow: hidden; }
-    .ia-col-header { padding: 6px 9px; border-bottom: 1px solid rgba(148,163,184,.5); background: rgba(30,64,175,.35); }
-    .ia-col-label { font-size: 11px; text-transform: uppercase; letter-spacing: .14em; }
-    .ia-col-body { padding: 8px 9px 10px; }
-    .ia-col-body p { margin: 0 0 4px; font-size: 13px; }
-    .ia-badge-empty { display: inline-block; padding: 4px 8px; border-radius: 999px; border: 1px dashed rgba(148,163,184,.7); font-size: 11px; color: #9ca3af; }
-    .ia-status { font-weight: 600; }
-    .ia-meta { font-size: 12px; color: #9ca3af; }
-  </style>
-
-  <script>
-    // Injecté côté serveur
-    window.API_BASE = "__API_BASE__";
-  </script>
-</head>
-<body>
-  <div class="ia-shell">
-    <div class="ia-card">
-      <h1 class="ia-title">NBA Injury Checker</h1>
-      <p class="ia-subtitle">Widget stable (chargement joueurs via API, player_id partout).</p>
-
-      <div class="ia-search-row">
-        <div class="ia-search">
-          <div class="ia-search-input-wrap">
-            <input id="ia-player-input" type="text" placeholder="Tape puis clique une suggestion" autocomplete="off" />
-            <div id="ia-suggestions" class="ia-suggestions" style="display:none;"></div>
-          </div>
-          <button id="ia-search-btn" disabled>Chargement...</button>
-        </div>
-        <button id="ia-reset-btn" type="button">Réinitialiser</button>
-      </div>
-
-      <div id="ia-loader" class="ia-loader">Chargement...</div>
-      <div id="ia-error" class="ia-error"></div>
-
-      <div id="ia-player-card" class="ia-player-card">
-        <div class="ia-player-left">
-          <img id="ia-team-logo" class="ia-team-logo" alt="" />
-          <div class="ia-player-text">
-            <div id="ia-player-name" class="ia-player-name"></div>
-            <div id="ia-player-meta" class="ia-player-meta"></div>
-          </div>
-        </div>
-        <div id="ia-player-badge" class="ia-badge"></div>
-      </div>
-
-      <div id="ia-results" style="display:none;">
-        <div class="ia-grid">
-          <div class="ia-col" id="ia-src-bdl">
-            <div class="ia-col-header"><span class="ia-col-label">BallDontLie</span></div>
-            <div class="ia-col-body"></div>
-          </div>
-          <div class="ia-col" id="ia-src-espn">
-            <div class="ia-col-header"><span class="ia-col-label">ESPN</span></div>
-            <div class="ia-col-body"></div>
-          </div>
-          <div class="ia-col" id="ia-src-cbs">
-            <div class="ia-col-header"><span class="ia-col-label">CBS</span></div>
-            <div class="ia-col-body"></div>
-          </div>
-          <div class="ia-col" id="ia-src-nbc">
-            <div class="ia-col-header"><span class="ia-col-label">NBC</span></div>
-            <div class="ia-col-body"></div>
-          </div>
-        </div>
-      </div>
-
-    </div>
-  </div>
-
-  <script>
-    (function () {
-      const API_BASE = (window.API_BASE || "").replace(/\/+$/, "");
-      let ACTIVE_PLAYERS = [];
-
-      const input = document.getElementById("ia-player-input");
-      const searchBtn = document.getElementById("ia-search-btn");
-      const resetBtn = document.getElementById("ia-reset-btn");
-      const loader = document.getElementById("ia-loader");
-      const errorBox = document.getElementById("ia-error");
-      const results = document.getElementById("ia-results");
-      const suggBox = document.getElementById("ia-suggestions");
-
-      const playerCard = document.getElementById("ia-player-card");
-      const playerNameEl = document.getElementById("ia-player-name");
-      const playerMetaEl = document.getElementById("ia-player-meta");
-      const playerBadgeEl = document.getElementById("ia-player-badge");
-      const teamLogoEl = document.getElementById("ia-team-logo");
-
-      const srcBdl = document.querySelector("#ia-src-bdl .ia-col-body");
-      const srcEspn = document.querySelector("#ia-src-espn .ia-col-body");
-      const srcCbs = document.querySelector("#ia-src-cbs .ia-col-body");
-      const srcNbc = document.querySelector("#ia-src-nbc .ia-col-body");
-
-      let selectedPlayer = null;
-      let suggTimeout = null;
-
-      function teamLogoUrl(abbr) {
-        if (!abbr) return "";
-        return "https://a.espncdn.com/i/teamlogos/nba/500/" + abbr.toLowerCase() + ".png";
-      }
-
-      function norm(s) {
-        if (!s) return "";
-        s = s.normalize("NFKD").replace(/[\u0300-\u036f]/g, "");
-        s = s.toLowerCase().replace(/[^a-z0-9\s]/g, " ").replace(/\s+/g, " ").trim();
-        const parts = s.split(" ").filter(x => x && !["jr","sr","ii","iii","iv","v"].includes(x));
-        return parts.join(" ");
-      }
-
-      function setError(msg) {
-        if (!msg) {
-          errorBox.style.display = "none";
-          errorBox.textContent = "";
-        } else {
-          errorBox.style.display = "block";
-          errorBox.textContent = msg;
-        }
-      }
-
-      function setLoading(isLoading, label) {
-        loader.style.display = isLoading ? "block" : "none";
-        if (label) loader.textContent = label;
-        searchBtn.disabled = isLoading || !ACTIVE_PLAYERS.length;
-      }
-
-      function clearSources() {
-        srcBdl.innerHTML = "";
-        srcEspn.innerHTML = "";
-        srcCbs.innerHTML = "";
-        srcNbc.innerHTML = "";
-      }
-
-      function renderEmpty(el) {
-        el.innerHTML = '<span class="ia-badge-empty">Aucune info</span>';
-      }
-
-      function closeSuggestions() {
-        suggBox.style.display = "none";
-        suggBox.innerHTML = "";
-      }
-
-      function openSuggestions(items) {
-        if (!items.length) {
-          closeSuggestions();
-          return;
-        }
-        suggBox.innerHTML = "";
-        items.slice(0, 8).forEach(function (p) {
-          const div = document.createElement("div");
-          div.className = "ia-suggestion-item";
-
-          const left = document.createElement("div");
-          left.className = "ia-suggestion-name";
-          left.textContent = p.full_name;
-
-          const right = document.createElement("div");
-          right.className = "ia-suggestion-meta";
-          const team = p.team || {};
-          const metaParts = [];
-          if (team.abbreviation) metaParts.push(team.abbreviation);
-          if (p.position) metaParts.push(p.position);
-          right.textContent = metaParts.join(" · ");
-
-          div.appendChild(left);
-          div.appendChild(right);
-
-          div.addEventListener("click", function () {
-            selectedPlayer = p;
-            input.value = p.full_name;
-            closeSuggestions();
-            searchPlayer();
-          });
-
-          suggBox.appendChild(div);
-        });
-        suggBox.style.display = "block";
-      }
-
-      function fetchSuggestionsLocal(q) {
-        const nq = norm(q);
-        if (!nq || nq.length < 3) {
-          closeSuggestions();
-          return;
-        }
-        const filtered = ACTIVE_PLAYERS.filter(function (p) {
-          return norm(p.full_name).includes(nq);
-        });
-        openSuggestions(filtered);
-      }
-
-      function resolveSelectedIfExactName() {
-        const nq = norm(input.value || "");
-        const exact = ACTIVE_PLAYERS.filter(p => norm(p.full_name) === nq);
-        if (exact.length === 1) {
-          selectedPlayer = exact[0];
-          return true;
-        }
-        return false;
-      }
-
-      function renderPlayerCard(data) {
-        const p = data.player || {};
-        const team = p.team || {};
-        const abbr = team.abbreviation || "";
-        const pos = p.position || "";
-        const name = p.full_name || "Joueur";
-
-        playerNameEl.textContent = name;
-        playerMetaEl.textContent = [abbr, pos].filter(Boolean).join(" · ");
-
-        const logo = teamLogoUrl(abbr);
-        if (logo) {
-          teamLogoEl.src = logo;
-          teamLogoEl.style.display = "block";
-        } else {
-          teamLogoEl.src = "";
-          teamLogoEl.style.display = "none";
-        }
+_RE_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
 
-        const agg = data.aggregated || {};
-        const status = agg.status || "clear";
-
-        playerBadgeEl.className = "ia-badge " + (status === "flagged" ? "ia-badge-flagged" : "ia-badge-clear");
-        playerBadgeEl.textContent = status === "flagged" ? "flagged" : "clear";
-
-        playerCard.style.display = "flex";
-      }
-
-      async function loadPlayers() {
-        setError("");
-        setLoading(true, "Chargement joueurs...");
-        searchBtn.textContent = "Chargement...";
-
-        try {
-          const url = API_BASE + "/players/active/local";
-          const res = await fetch(url, { method: "GET" });
-          if (!res.ok) throw new Error("players load failed: " + res.status);
-          const data = await res.json();
-          ACTIVE_PLAYERS = data.players || [];
-          if (!ACTIVE_PLAYERS.length) throw new Error("empty players list");
-          searchBtn.textContent = "Chercher";
-          searchBtn.disabled = false;
-          setLoading(false);
-        } catch (e) {
-          console.error(e);
-          setError("Impossible de charger la liste des joueurs (service en veille ou erreur). Recharge la page.");
-          setLoading(false);
-          searchBtn.textContent = "Chercher";
-          searchBtn.disabled = true;
-        }
-      }
-
-      async function searchPlayer() {
-        setError("");
-        results.style.display = "none";
-        playerCard.style.display = "none";
-        clearSources();
-
-        if (!selectedPlayer) {
-          const ok = resolveSelectedIfExactName();
-          if (!ok) {
-            setError("Sélectionne un joueur dans les suggestions (pour éviter les homonymes).");
-            return;
-          }
-        }
 
-        setLoading(true, "Recherche en cours...");
-        try {
-          const url = API_BASE + "/injuries/by-player-id?player_id=" + encodeURIComponent(selectedPlayer.id);
-          const res = await fetch(url, { method: "GET" });
-
-          if (!res.ok) {
-            const txt = await res.text();
-            throw new Error("API error " + res.status + " " + txt);
-          }
-          const data = await res.json();
-          renderResults(data);
-        } catch (e) {
-          console.error(e);
-          setError("Erreur lors de la récupération. Réessaie (ou le service Render est en veille).");
-        } finally {
-          setLoading(false);
-        }
-      }
-
-      function renderResults(data) {
-        results.style.display = "block";
-        clearSources();
-        renderPlayerCard(data);
-
-        const bdlInj = (data.sources?.balldontlie?.injuries || [])[0];
-        if (!bdlInj) renderEmpty(srcBdl);
-        else {
-          const status = bdlInj.status || "N/A";
-          const ret = bdlInj.return_date || "";
-          srcBdl.innerHTML =
-            '<p class="ia-status">' + status + (ret ? " · retour " + ret : "") + "</p>" +
-            (bdlInj.description ? '<p class="ia-meta">' + bdlInj.description + "</p>" : "");
-        }
+def _minify_widget_source(source: str) -> str:
+    # Minification prudente, une seule fois à l'import: commentaires CSS, indentation,
+    # lignes vides et commentaires JS pleine ligne. Les retours à la ligne restent
+    # (insertion automatique de ";" en JS intacte).
+    source = _RE_CSS_COMMENT.sub("", source)
+    lines = (line.strip() for line in source.splitlines())
+    return "\n".join(line for line in lines if line and not line.startswith("//"))
 
-        const espnInj = (data.sources?.espn?.injuries || [])[0];
-        if (!espnInj) renderEmpty(srcEspn);
-        else {
-          srcEspn.innerHTML =
-            '<p class="ia-status">' + (espnInj.status || "N/A") +
-            (espnInj.est_return_date ? " · retour " + espnInj.est_return_date : "") + "</p>" +
-            (espnInj.comment ? '<p class="ia-meta">' + espnInj.comment + "</p>" : "");
-        }
 
-        const cbsInj = (data.sources?.cbs?.injuries || [])[0];
-        if (!cbsInj) renderEmpty(srcCbs);
-        else {
-          srcCbs.innerHTML =
-            '<p class="ia-status">' + (cbsInj.status || "N/A") + "</p>" +
-            '<p class="ia-meta">' +
-            (cbsInj.injury || "Injury n/a") +
-            (cbsInj.updated ? " · maj " + cbsInj.updated : "") +
-            "</p>";
-        }
+# CSS/JS du widget servis à part sous un nom haché: cache navigateur permanent,
+# une nouvelle version change l'URL. Nom haché -> (media type, variantes encodées).
+_WIDGET_STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+_WIDGET_ASSETS: Dict[str, Tuple[str, Dict[str, Tuple[bytes, str]]]] = {}
 
-        const nbcInj = (data.sources?.nbc?.injuries || [])[0];
-        if (!nbcInj) renderEmpty(srcNbc);
-        else {
-          srcNbc.innerHTML =
-            '<p class="ia-status">' + (nbcInj.headline || "NBC") + "</p>" +
-            (nbcInj.summary ? '<p class="ia-meta">' + nbcInj.summary + "</p>' : "") +
-            (nbcInj.url ? '<p class="ia-meta">' + nbcInj.url + "</p>" : "");
-        }
-      }
-
-      function resetSearch() {
-        input.value = "";
-        selectedPlayer = null;
-        closeSuggestions();
-        setError("");
-        results.style.display = "none";
-        playerCard.style.display = "none";
-        clearSources();
-        loader.style.display = "none";
-      }
-
-      searchBtn.addEventListener("click", searchPlayer);
-      resetBtn.addEventListener("click", resetSearch);
-
-      input.addEventListener("keydown", function (e) {
-        if (e.key === "Enter") searchPlayer();
-        if (e.key === "Escape") closeSuggestions();
-      });
-
-      input.addEventListener("input", function () {
-        selectedPlayer = null;
-        const q = (input.value || "").trim();
-        if (suggTimeout) clearTimeout(suggTimeout);
-        suggTimeout = setTimeout(function () { fetchSuggestionsLocal(q); }, 120);
-      });
-
-      document.addEventListener("click", function (e) {
-        if (!suggBox.contains(e.target) && e.target !== input) closeSuggestions();
-      });
-
-      // Init
-      loadPlayers();
-    })();
-  </script>
-</body>
-</html>
-"""
+
+def _register_widget_asset(filename: str, media_type: str) -> str:
+    with open(os.path.join(_WIDGET_STATIC_DIR, filename), encoding="utf-8") as f:
+        body = _minify_widget_source(f.read()).encode("utf-8")
+    stem, ext = os.path.splitext(filename)
+    name = f"{stem}.{hashlib.blake2b(body, digest_size=6).hexdigest()}{ext}"
+    _WIDGET_ASSETS[name] = (media_type, _encoded_variants(body))
+    return name
+
+
+# Coquille HTML: noms des assets fixés à l'import, seule $api_base reste à substituer par requête.
+with open(os.path.join(_WIDGET_STATIC_DIR, "widget.html"), encoding="utf-8") as _f:
+    WIDGET_HTML_TEMPLATE = Template(
+        Template(_minify_widget_source(_f.read())).safe_substitute(
+            widget_css=_register_widget_asset("widget.css", "text/css; charset=utf-8"),
+            widget_js=_register_widget_asset("widget.js", "text/javascript; charset=utf-8"),
+        )
+    )
+
+
+@lru_cache(maxsize=16)
+def _render_widget(api_base: str) -> Dict[str, Tuple[bytes, str]]:
+    # Le template est figé: une seule substitution + compression par base URL (quelques hôtes au plus).
+    return _encoded_variants(WIDGET_HTML_TEMPLATE.substitute(api_base=api_base).encode("utf-8"))
 
 
 @app.get("/widget", response_class=HTMLResponse)
-def widget(request: Request) -> str:
+def widget(request: Request) -> Response:
     # Important: base URL Render (même si le widget est embed sur Carrd hors iframe)
     api_base = str(request.base_url).rstrip("/")
-    return WIDGET_HTML_TEMPLATE.replace("__API_BASE__", api_base)
+    return _encoded_response(
+        request, _render_widget(api_base), "text/html; charset=utf-8", max_age=300, stale_while_revalidate=3600
+    )
+
+
+@app.get("/static/{name}")
+def widget_asset(request: Request, name: str) -> Response:
+    asset = _WIDGET_ASSETS.get(name)
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    media_type, variants = asset
+    # Contenu adressé par son hash: ne change jamais sous cette URL.
+    return _encoded_response(request, variants, media_type, max_age=31536000, immutable=True)
 
 
 # ============================================================
@@ -1012,3 +1336,21 @@ def widget(request: Request) -> str:
 def favicon():
     # Optionnel: évite le bruit 404 dans la console.
     return HTMLResponse(content="", status_code=204)
+
+
+# ============================================================
+#                          LANCEMENT
+# ============================================================
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # Caches par process: chaque worker chauffe son propre cache joueurs au démarrage.
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=int(os.getenv("PORT", "8000")),
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", "4")),
+    )
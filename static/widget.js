@@ -0,0 +1,418 @@
+(function () {
+  const API_BASE = (window.API_BASE || "").replace(/\/+$/, "");
+  let ACTIVE_PLAYERS = [];
+
+  const input = document.getElementById("ia-player-input");
+  const searchBtn = document.getElementById("ia-search-btn");
+  const resetBtn = document.getElementById("ia-reset-btn");
+  const loader = document.getElementById("ia-loader");
+  const errorBox = document.getElementById("ia-error");
+  const results = document.getElementById("ia-results");
+  const suggBox = document.getElementById("ia-suggestions");
+
+  const playerCard = document.getElementById("ia-player-card");
+  const playerNameEl = document.getElementById("ia-player-name");
+  const playerMetaEl = document.getElementById("ia-player-meta");
+  const playerBadgeEl = document.getElementById("ia-player-badge");
+  const teamLogoEl = document.getElementById("ia-team-logo");
+
+  // Une entrée par colonne: clé dans data.sources, colonne, et mise en forme du premier résultat.
+  const SOURCES = [
+    {
+      key: "balldontlie",
+      col: sourceColumn("ia-src-bdl"),
+      status: i => (i.status || "N/A") + (i.return_date ? " · retour " + i.return_date : ""),
+      metas: i => [i.description],
+    },
+    {
+      key: "espn",
+      col: sourceColumn("ia-src-espn"),
+      status: i => (i.status || "N/A") + (i.est_return_date ? " · retour " + i.est_return_date : ""),
+      metas: i => [i.comment],
+    },
+    {
+      key: "cbs",
+      col: sourceColumn("ia-src-cbs"),
+      status: i => i.status || "N/A",
+      metas: i => [(i.injury || "Injury n/a") + (i.updated ? " · maj " + i.updated : "")],
+    },
+    {
+      key: "nbc",
+      col: sourceColumn("ia-src-nbc"),
+      status: i => i.headline || "NBC",
+      metas: i => [i.summary, i.url],
+    },
+  ];
+
+  let selectedPlayer = null;
+  let suggTimeout = null;
+  let suggIdle = null;
+  // Filtrage lancé quand le navigateur est libre (frappe/peinture d'abord), au plus tard après 200 ms.
+  const requestIdle = window.requestIdleCallback
+    ? function (cb) { return window.requestIdleCallback(cb, { timeout: 200 }); }
+    : function (cb) { return setTimeout(cb, 0); };
+  const cancelIdle = window.cancelIdleCallback ? window.cancelIdleCallback.bind(window) : clearTimeout;
+  // Suggestions affichées, indexées par data-idx (lues par les écouteurs délégués de suggBox).
+  let shownSuggestions = [];
+  // Délai adaptatif: ~1.2x le temps moyen (EMA) du filtrage, borné à [30, 200] ms.
+  let debounceMs = 80, filterEma = 40;
+
+  // Trigramme -> positions dans ACTIVE_PLAYERS, construit une fois au chargement de la liste.
+  let TRIGRAM_INDEX = new Map();
+
+  function teamLogoUrl(abbr) {
+    if (!abbr) return "";
+    return "https://a.espncdn.com/i/teamlogos/nba/500/" + abbr.toLowerCase() + ".png";
+  }
+
+  function norm(s) {
+    if (!s) return "";
+    s = s.normalize("NFKD").replace(/[\u0300-\u036f]/g, "");
+    s = s.toLowerCase().replace(/[^a-z0-9\s]/g, " ").replace(/\s+/g, " ").trim();
+    const parts = s.split(" ").filter(x => x && !["jr","sr","ii","iii","iv","v"].includes(x));
+    return parts.join(" ");
+  }
+
+  function setError(msg) {
+    if (!msg) {
+      errorBox.style.display = "none";
+      errorBox.textContent = "";
+    } else {
+      errorBox.style.display = "block";
+      errorBox.textContent = msg;
+    }
+  }
+
+  function setLoading(isLoading, label) {
+    loader.style.display = isLoading ? "block" : "none";
+    if (label) loader.textContent = label;
+    searchBtn.disabled = isLoading || !ACTIVE_PLAYERS.length;
+  }
+
+  // Noeuds de chaque colonne présents une fois pour toutes dans le HTML: un rendu ne
+  // fait que poser textContent (jamais interprété comme HTML) et basculer hidden.
+  function sourceColumn(id) {
+    const body = document.querySelector("#" + id + " .ia-col-body");
+    return {
+      empty: body.querySelector(".ia-badge-empty"),
+      status: body.querySelector(".ia-status"),
+      metas: body.querySelectorAll(".ia-meta"),
+    };
+  }
+
+  function hideSource(col) {
+    col.empty.hidden = true;
+    col.status.hidden = true;
+    col.metas.forEach(function (meta) { meta.hidden = true; });
+  }
+
+  function clearSources() {
+    SOURCES.forEach(function (s) { hideSource(s.col); });
+  }
+
+  function renderEmpty(col) {
+    hideSource(col);
+    col.empty.hidden = false;
+  }
+
+  function renderSource(col, status, metas) {
+    col.empty.hidden = true;
+    col.status.textContent = status;
+    col.status.hidden = false;
+    const texts = metas.filter(Boolean);
+    col.metas.forEach(function (meta, i) {
+      meta.textContent = texts[i] || "";
+      meta.hidden = !texts[i];
+    });
+  }
+
+  function closeSuggestions() {
+    suggBox.style.display = "none";
+    suggBox.replaceChildren();
+    shownSuggestions = [];
+  }
+
+  function openSuggestions(items) {
+    if (!items.length) {
+      closeSuggestions();
+      return;
+    }
+    // Construit hors DOM puis inséré en une fois: un seul recalcul de style/layout.
+    const frag = document.createDocumentFragment();
+    const n = Math.min(8, items.length);
+    for (let i = 0; i < n; i++) {
+      const p = items[i];
+      const div = document.createElement("div");
+      div.className = "ia-suggestion-item";
+      div.dataset.idx = i;
+
+      const left = document.createElement("div");
+      left.className = "ia-suggestion-name";
+      left.textContent = p.full_name;
+
+      const right = document.createElement("div");
+      right.className = "ia-suggestion-meta";
+      const metaParts = [];
+      if (p.abbr) metaParts.push(p.abbr);
+      if (p.position) metaParts.push(p.position);
+      right.textContent = metaParts.join(" · ");
+
+      div.appendChild(left);
+      div.appendChild(right);
+      frag.appendChild(div);
+    }
+    shownSuggestions = items;
+    suggBox.replaceChildren(frag);
+    suggBox.style.display = "block";
+    // Un seul candidat: le clic sur "Chercher" est très probable.
+    if (items.length === 1) prefetchInjuries(items[0].id);
+  }
+
+  // Requêtes /injuries/by-player-id en cours ou récentes, par joueur: le survol d'une
+  // suggestion lance la requête, le clic réutilise la même promesse.
+  const INJURIES_PREFETCH = new Map();
+  const INJURIES_PREFETCH_MS = 60000;
+
+  function fetchInjuries(playerId) {
+    let pending = INJURIES_PREFETCH.get(playerId);
+    if (pending) return pending;
+
+    const url = API_BASE + "/injuries/by-player-id?player_id=" + encodeURIComponent(playerId);
+    pending = fetch(url, { method: "GET" }).then(async function (res) {
+      if (!res.ok) {
+        const txt = await res.text();
+        throw new Error("API error " + res.status + " " + txt);
+      }
+      return res.json();
+    });
+    INJURIES_PREFETCH.set(playerId, pending);
+
+    function forget() {
+      if (INJURIES_PREFETCH.get(playerId) === pending) INJURIES_PREFETCH.delete(playerId);
+    }
+    pending.catch(forget);
+    setTimeout(forget, INJURIES_PREFETCH_MS);
+    return pending;
+  }
+
+  function prefetchInjuries(playerId) {
+    // Erreur ignorée ici: elle sera remontée (et la requête relancée) au clic.
+    fetchInjuries(playerId).catch(function () {});
+  }
+
+  function buildSuggestionIndex() {
+    lastQuery = "";
+    lastMatches = [];
+    TRIGRAM_INDEX = new Map();
+    ACTIVE_PLAYERS.forEach(function (p, i) {
+      const n = p.norm_name || "";
+      for (let k = 0; k + 3 <= n.length; k++) {
+        const tri = n.slice(k, k + 3);
+        let bucket = TRIGRAM_INDEX.get(tri);
+        if (!bucket) {
+          bucket = new Set();
+          TRIGRAM_INDEX.set(tri, bucket);
+        }
+        bucket.add(i);
+      }
+    });
+  }
+
+  function fetchSuggestionsLocal(q) {
+    const t0 = performance.now();
+    filterSuggestionsLocal(q);
+    filterEma = 0.5 * filterEma + 0.5 * (performance.now() - t0);
+    debounceMs = Math.max(30, Math.min(200, 1.2 * filterEma));
+  }
+
+  // Dernière requête et toutes ses correspondances: une requête qui la prolonge
+  // ("kris" -> "krist") ne peut matcher qu'un sous-ensemble de ces joueurs.
+  let lastQuery = "", lastMatches = [];
+
+  function filterSuggestionsLocal(q) {
+    const nq = norm(q);
+    if (!nq || nq.length < 3) {
+      lastQuery = "";
+      lastMatches = [];
+      closeSuggestions();
+      return;
+    }
+    const starts = [], wordStarts = [], contains = [];
+    function rank(p) {
+      const pos = p.norm_name.indexOf(nq);
+      if (pos === 0) starts.push(p);
+      else if (pos > 0 && p.norm_name[pos - 1] === " ") wordStarts.push(p);
+      else if (pos > 0) contains.push(p);
+    }
+    if (lastQuery && nq.startsWith(lastQuery)) {
+      lastMatches.forEach(rank);
+    } else {
+      // Tout nom contenant nq contient son premier trigramme: seule cette liste courte est vérifiée.
+      const candidates = TRIGRAM_INDEX.get(nq.slice(0, 3));
+      if (candidates) candidates.forEach(function (i) { rank(ACTIVE_PLAYERS[i]); });
+    }
+    lastQuery = nq;
+    lastMatches = starts.concat(wordStarts, contains);
+    openSuggestions(lastMatches);
+  }
+
+  function resolveSelectedIfExactName() {
+    const nq = norm(input.value || "");
+    const exact = ACTIVE_PLAYERS.filter(p => p.norm_name === nq);
+    if (exact.length === 1) {
+      selectedPlayer = exact[0];
+      return true;
+    }
+    return false;
+  }
+
+  function renderPlayerCard(data) {
+    const p = data.player || {};
+    const team = p.team || {};
+    const abbr = team.abbreviation || "";
+    const pos = p.position || "";
+    const name = p.full_name || "Joueur";
+
+    playerNameEl.textContent = name;
+    playerMetaEl.textContent = [abbr, pos].filter(Boolean).join(" · ");
+
+    const logo = teamLogoUrl(abbr);
+    if (logo) {
+      teamLogoEl.src = logo;
+      teamLogoEl.style.display = "block";
+    } else {
+      teamLogoEl.src = "";
+      teamLogoEl.style.display = "none";
+    }
+
+    const agg = data.aggregated || {};
+    const status = agg.status || "clear";
+
+    playerBadgeEl.className = "ia-badge " + (status === "flagged" ? "ia-badge-flagged" : "ia-badge-clear");
+    playerBadgeEl.textContent = status === "flagged" ? "flagged" : "clear";
+
+    playerCard.style.display = "flex";
+  }
+
+  async function loadPlayers() {
+    setError("");
+    setLoading(true, "Chargement joueurs...");
+    searchBtn.textContent = "Chargement...";
+
+    try {
+      const url = API_BASE + "/players/active/local?compact=1";
+      const res = await fetch(url, { method: "GET" });
+      if (!res.ok) throw new Error("players load failed: " + res.status);
+      const data = await res.json();
+      ACTIVE_PLAYERS = data.players || [];
+      if (!ACTIVE_PLAYERS.length) throw new Error("empty players list");
+      buildSuggestionIndex();
+      searchBtn.textContent = "Chercher";
+      searchBtn.disabled = false;
+      setLoading(false);
+    } catch (e) {
+      console.error(e);
+      setError("Impossible de charger la liste des joueurs (service en veille ou erreur). Recharge la page.");
+      setLoading(false);
+      searchBtn.textContent = "Chercher";
+      searchBtn.disabled = true;
+    }
+  }
+
+  async function searchPlayer() {
+    setError("");
+    results.style.display = "none";
+    playerCard.style.display = "none";
+    clearSources();
+
+    if (!selectedPlayer) {
+      const ok = resolveSelectedIfExactName();
+      if (!ok) {
+        setError("Sélectionne un joueur dans les suggestions (pour éviter les homonymes).");
+        return;
+      }
+    }
+
+    setLoading(true, "Recherche en cours...");
+    try {
+      const data = await fetchInjuries(selectedPlayer.id);
+      renderResults(data);
+    } catch (e) {
+      console.error(e);
+      setError("Erreur lors de la récupération. Réessaie (ou le service Render est en veille).");
+    } finally {
+      setLoading(false);
+    }
+  }
+
+  function renderResults(data) {
+    results.style.display = "block";
+    clearSources();
+    renderPlayerCard(data);
+
+    for (const s of SOURCES) {
+      const inj = (data.sources?.[s.key]?.injuries || [])[0];
+      if (!inj) renderEmpty(s.col);
+      else renderSource(s.col, s.status(inj), s.metas(inj));
+    }
+  }
+
+  function resetSearch() {
+    input.value = "";
+    selectedPlayer = null;
+    closeSuggestions();
+    setError("");
+    results.style.display = "none";
+    playerCard.style.display = "none";
+    clearSources();
+    loader.style.display = "none";
+  }
+
+  searchBtn.addEventListener("click", searchPlayer);
+  resetBtn.addEventListener("click", resetSearch);
+
+  input.addEventListener("keydown", function (e) {
+    if (e.key === "Enter") searchPlayer();
+    if (e.key === "Escape") closeSuggestions();
+  });
+
+  input.addEventListener("input", function () {
+    selectedPlayer = null;
+    const q = (input.value || "").trim();
+    if (suggTimeout) clearTimeout(suggTimeout);
+    if (suggIdle) cancelIdle(suggIdle);
+    suggTimeout = setTimeout(function () {
+      suggIdle = requestIdle(function () {
+        suggIdle = null;
+        fetchSuggestionsLocal(q);
+      });
+    }, debounceMs);
+  });
+
+  // Écouteurs délégués posés une fois: rien à rattacher à chaque rendu des suggestions.
+  function suggestionAt(target) {
+    const item = target.closest(".ia-suggestion-item");
+    return item ? shownSuggestions[+item.dataset.idx] : null;
+  }
+
+  suggBox.addEventListener("mouseover", function (e) {
+    const p = suggestionAt(e.target);
+    if (p) prefetchInjuries(p.id);
+  });
+
+  suggBox.addEventListener("click", function (e) {
+    const p = suggestionAt(e.target);
+    if (!p) return;
+    selectedPlayer = p;
+    input.value = p.full_name;
+    closeSuggestions();
+    searchPlayer();
+  });
+
+  document.addEventListener("click", function (e) {
+    if (!suggBox.contains(e.target) && e.target !== input) closeSuggestions();
+  });
+
+  // Init
+  loadPlayers();
+})();
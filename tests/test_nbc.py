@@ -0,0 +1,28 @@
+import unittest
+
+import main
+
+
+class NBCTextLinesTest(unittest.TestCase):
+    def test_multiline_text_node_is_split(self):
+        # Régression chunk0-19: get_text("\n").split("\n") découpait un noeud texte multi-lignes.
+        html = b"<html><body><span>Share\n  Link copied to clipboard!</span><span>LeBron James LAL F</span></body></html>"
+        self.assertEqual(main._nbc_text_lines(html), ["Share", "Link copied to clipboard!", "LeBron James LAL F"])
+
+    def test_header_after_multiline_sentinel(self):
+        html = (
+            b"<html><body><p>Out for Friday.</p>"
+            b"<span>Share\nLink copied to clipboard!</span><span>LeBron James LAL F</span></body></html>"
+        )
+        self.assertEqual(
+            main._parse_nbc_news(html),
+            [("lebron james", {"headline": "LeBron James LAL F", "summary": "Out for Friday. Share"})],
+        )
+
+    def test_script_and_comments_skipped(self):
+        html = b"<html><body><script>var a =\n1;</script><!-- x --><p>Visible</p></body></html>"
+        self.assertEqual(main._nbc_text_lines(html), ["Visible"])
+
+
+if __name__ == "__main__":
+    unittest.main()